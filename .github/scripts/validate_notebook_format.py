@@ -15,29 +15,50 @@ Usage:
     python3 validate_notebook_format.py *.ipynb
 """
 
-import argparse
 import json
+import os
 import sys
+from itertools import repeat
 from pathlib import Path
 from typing import List, Tuple
 
+# Validating in-process runs at roughly 200 MB/s, while starting a process
+# pool costs tens of milliseconds (far more with the 'spawn' start method).
+# Below this much notebook data the pool costs more than it saves.
+_PARALLEL_MIN_BYTES = 64 * 1024 * 1024
 
-def validate_notebook_source_format(notebook_path: Path) -> Tuple[bool, List[str]]:
+
+def load_notebook(notebook_path: Path) -> Tuple[bool, dict, List[str]]:
     """
-    Validate notebook source format.
+    Read and parse a notebook file.
     
     Returns:
-        (is_valid, error_messages)
+        (is_valid, notebook, error_messages); notebook is empty if loading failed
     """
-    errors = []
-    
     try:
-        with open(notebook_path, 'r', encoding='utf-8') as f:
-            nb = json.load(f)
+        # One read, then an explicit UTF-8 decode: json.loads(bytes) would
+        # guess the encoding and accept BOMs and UTF-16/32 files
+        nb = json.loads(notebook_path.read_bytes().decode('utf-8'))
     except json.JSONDecodeError as e:
-        return False, [f"Invalid JSON: {e}"]
+        return False, {}, [f"Invalid JSON: {e}"]
     except Exception as e:
-        return False, [f"Failed to read notebook: {e}"]
+        return False, {}, [f"Failed to read notebook: {e}"]
+    
+    # Both validators expect a mapping at the top level
+    if not isinstance(nb, dict):
+        return False, {}, ["Notebook must be a JSON object"]
+    
+    return True, nb, []
+
+
+def validate_notebook_source_format(nb: dict) -> Tuple[bool, List[str]]:
+    """
+    Validate notebook source format.
+    
+    Returns:
+        (is_valid, error_messages)
+    """
+    errors = []
     
     cells = nb.get('cells', [])
     if not cells:
@@ -51,47 +72,38 @@ def validate_notebook_source_format(notebook_path: Path) -> Tuple[bool, List[str
         if not source:
             continue  # Empty source is valid
         
-        # Check if source is an array
         if isinstance(source, list):
+            # Every element must be a string; checking once here keeps type
+            # checks out of the per-element loops below
+            bad_idx = next((i for i, elem in enumerate(source) if not isinstance(elem, str)), None)
+            if bad_idx is not None:
+                errors.append(
+                    f"Cell {cell_idx}: Element {bad_idx} is not a string. "
+                    f"Source arrays must contain only strings."
+                )
+                continue
+        
+        # Check if source is an array. Fast path: in a well-formed cell every
+        # element but the last already ends with '\n', so no join can fuse
+        # two lines and the per-element scan is skipped.
+        if isinstance(source, list) and not all(elem.endswith('\n') for elem in source[:-1]):
             # Validate each element (except the last one)
             for elem_idx in range(len(source) - 1):
                 elem = source[elem_idx]
-                if isinstance(elem, str):
-                    # Check if element should end with newline
-                    # Rule: If next element exists and is not empty, current should end with \n
-                    next_elem = source[elem_idx + 1]
-                    if isinstance(next_elem, str) and next_elem.strip():
-                        # Check if current element ends with newline
-                        if not elem.endswith('\n'):
-                            # Check if this would cause concatenation issues
-                            # Common problematic patterns:
-                            problematic_patterns = [
-                                ('import os', 'exit_code'),
-                                ('import os', 'exit_code'),
-                                ('}', 'check_'),
-                                ('}', 'echo'),
-                                ('}', 'for'),
-                                ('}', 'done'),
-                                ('done', 'echo'),
-                                ('done', 'for'),
-                                ('done', '#'),
-                            ]
-                            
-                            # Check if concatenation would create problematic patterns
-                            concatenated = elem + next_elem
-                            has_problem = False
-                            for pattern_start, pattern_end in problematic_patterns:
-                                if pattern_start in elem.rstrip() and pattern_end in next_elem.lstrip():
-                                    # Check if they would be concatenated
-                                    if elem.rstrip().endswith(pattern_start) and next_elem.lstrip().startswith(pattern_end):
-                                        has_problem = True
-                                        break
-                            
-                            if has_problem or (elem.strip() and next_elem.strip()):
-                                errors.append(
-                                    f"Cell {cell_idx}: Element {elem_idx} missing newline. "
-                                    f"Content: {repr(elem[:50])}... → {repr(next_elem[:30])}..."
-                                )
+                # Check if element should end with newline
+                # Rule: If next element exists and is not empty, current should end with \n
+                next_elem = source[elem_idx + 1]
+                if next_elem.strip():
+                    # Check if current element ends with newline
+                    if not elem.endswith('\n'):
+                        # Two non-blank elements would be fused into one line
+                        # (e.g. 'import os' + 'exit_code' -> 'import osexit_code').
+                        # next_elem is known to be non-blank here.
+                        if elem.strip():
+                            errors.append(
+                                f"Cell {cell_idx}: Element {elem_idx} missing newline. "
+                                f"Content: {repr(elem[:50])}... → {repr(next_elem[:30])}..."
+                            )
         
         # Additional check: Shell script logic errors
         # Check for backslash continuation followed by empty line
@@ -100,57 +112,48 @@ def validate_notebook_source_format(notebook_path: Path) -> Tuple[bool, List[str
                 elem = source[elem_idx]
                 next_elem = source[elem_idx + 1]
                 
-                if isinstance(elem, str) and isinstance(next_elem, str):
-                    # Check if line ends with backslash (continuation character)
-                    # In Python strings, '\\' represents a single backslash character
-                    elem_stripped = elem.rstrip()
-                    # Check if ends with backslash (in Python string literal: '\\' = single \)
-                    # Use regex to properly detect backslash at end
-                    import re
-                    ends_with_backslash = bool(re.search(r'\\$', elem_stripped))
-                    ends_with_and_backslash = bool(re.search(r' && \\$', elem_stripped))
-                    
-                    if ends_with_backslash or ends_with_and_backslash:
-                        # Check if next line is empty or only whitespace
-                        if next_elem.strip() == '':
+                # Check if line ends with backslash (continuation character)
+                # In Python strings, '\\' represents a single backslash character
+                # (a trailing ' && \\' is covered by the same suffix test)
+                if elem.rstrip().endswith('\\'):
+                    # Check if next line is empty or only whitespace
+                    if next_elem.strip() == '':
+                        errors.append(
+                            f"Cell {cell_idx}: Element {elem_idx} has backslash continuation "
+                            f"followed by empty line. This will cause 'sh: X: : not found' error. "
+                            f"Content: {repr(elem[:60])}..."
+                        )
+                    # Check if next line doesn't continue the command (doesn't start with space/tab)
+                    elif not next_elem.startswith(' ') and not next_elem.startswith('\t') and next_elem.strip():
+                        # Next line is not a continuation, but current line has backslash
+                        # This might be intentional, but could be an error
+                        # Only warn if it's clearly a problem (next line starts a new command)
+                        if next_elem.strip().startswith(('echo', 'if', 'for', 'while', 'done', 'fi', 'then', 'else')):
                             errors.append(
                                 f"Cell {cell_idx}: Element {elem_idx} has backslash continuation "
-                                f"followed by empty line. This will cause 'sh: X: : not found' error. "
-                                f"Content: {repr(elem[:60])}..."
+                                f"but next line starts a new command. Remove the backslash or add continuation. "
+                                f"Content: {repr(elem[:60])}... → {repr(next_elem[:30])}..."
                             )
-                        # Check if next line doesn't continue the command (doesn't start with space/tab)
-                        elif not next_elem.startswith(' ') and not next_elem.startswith('\t') and next_elem.strip():
-                            # Next line is not a continuation, but current line has backslash
-                            # This might be intentional, but could be an error
-                            # Only warn if it's clearly a problem (next line starts a new command)
-                            if next_elem.strip().startswith(('echo', 'if', 'for', 'while', 'done', 'fi', 'then', 'else')):
-                                errors.append(
-                                    f"Cell {cell_idx}: Element {elem_idx} has backslash continuation "
-                                    f"but next line starts a new command. Remove the backslash or add continuation. "
-                                    f"Content: {repr(elem[:60])}... → {repr(next_elem[:30])}..."
-                                )
         
         elif isinstance(source, str):
             # Single string format: check for backslash + empty line pattern
-            import re
+            # Split on '\n' only, as the shell does; a final newline does not
+            # start another (empty) line
             lines = source.split('\n')
-            for i in range(len(lines) - 1):
-                line = lines[i]
-                next_line = lines[i + 1]
-                line_stripped = line.rstrip()
-                ends_with_backslash = bool(re.search(r'\\$', line_stripped))
-                ends_with_and_backslash = bool(re.search(r' && \\$', line_stripped))
-                if ends_with_backslash or ends_with_and_backslash:
+            if source.endswith('\n'):
+                lines.pop()
+            for line_no, (line, next_line) in enumerate(zip(lines, lines[1:]), 1):
+                if line.rstrip().endswith('\\'):
                     if next_line.strip() == '':
                         errors.append(
-                            f"Cell {cell_idx}: Line {i+1} has backslash continuation "
+                            f"Cell {cell_idx}: Line {line_no} has backslash continuation "
                             f"followed by empty line. This will cause shell script errors."
                         )
     
     return len(errors) == 0, errors
 
 
-def validate_notebook_structure(notebook_path: Path) -> Tuple[bool, List[str]]:
+def validate_notebook_structure(nb: dict) -> Tuple[bool, List[str]]:
     """
     Validate basic notebook structure.
     
@@ -159,14 +162,6 @@ def validate_notebook_structure(notebook_path: Path) -> Tuple[bool, List[str]]:
     """
     errors = []
     
-    try:
-        with open(notebook_path, 'r', encoding='utf-8') as f:
-            nb = json.load(f)
-    except json.JSONDecodeError as e:
-        return False, [f"Invalid JSON: {e}"]
-    except Exception as e:
-        return False, [f"Failed to read notebook: {e}"]
-    
     # Check required fields
     if 'cells' not in nb:
         errors.append("Missing 'cells' field")
@@ -177,56 +172,173 @@ def validate_notebook_structure(notebook_path: Path) -> Tuple[bool, List[str]]:
     return len(errors) == 0, errors
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description='Validate Jupyter Notebook format',
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+def _total_size(paths: List[Path]) -> int:
+    """Total size in bytes of the given files; unreadable files count as 0."""
+    total = 0
+    for path in paths:
+        try:
+            total += path.stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+def _validate_one(notebook_path: Path, skip_structure_check: bool = False) -> Tuple[bool, str, List[str]]:
+    """
+    Run all checks on a single notebook.
+    
+    Returns:
+        (is_valid, failed_check, error_messages); failed_check is
+        'Structure' or 'Format' when validation fails
+    """
+    # Parse once; both validators share the loaded notebook
+    loaded, nb, load_errors = load_notebook(notebook_path)
+    if not loaded:
+        # Reported against whichever check would have read the file first
+        return False, 'Format' if skip_structure_check else 'Structure', load_errors
+    
+    # Structure validation
+    if not skip_structure_check:
+        struct_valid, struct_errors = validate_notebook_structure(nb)
+        if not struct_valid:
+            return False, 'Structure', struct_errors
+    
+    # Source format validation
+    format_valid, format_errors = validate_notebook_source_format(nb)
+    return format_valid, 'Format', format_errors
+
+
+_USAGE = "usage: {prog} [-h] [-v] [--skip-structure-check] notebooks [notebooks ...]"
+
+_HELP = """{usage}
+
+Validate Jupyter Notebook format
+
+positional arguments:
+  notebooks             Notebook file(s) to validate
+
+options:
+  -h, --help            show this help message and exit
+  -v, --verbose         Show detailed validation information
+  --skip-structure-check
+                        Skip basic structure validation (only check source format)
+
 Examples:
   # Validate a single notebook
-  %(prog)s notebook.ipynb
+  {prog} notebook.ipynb
 
   # Validate multiple notebooks
-  %(prog)s *.ipynb
+  {prog} *.ipynb
 
   # Validate with verbose output
-  %(prog)s -v notebook.ipynb
-        """
-    )
+  {prog} -v notebook.ipynb
+"""
+
+
+_LONG_OPTIONS = ('--help', '--verbose', '--skip-structure-check')
+_SHORT_OPTIONS = {'h': '--help', 'v': '--verbose'}
+
+
+def parse_args(argv: List[str]) -> Tuple[List[str], bool, bool]:
+    """
+    Parse the command line (argv[0] is the program name).
     
-    parser.add_argument(
-        'notebooks',
-        nargs='+',
-        help='Notebook file(s) to validate'
-    )
+    argparse is avoided to keep start-up cheap; like argparse, unique
+    prefixes of long options and bundled short flags (e.g. -vh) are accepted.
     
-    parser.add_argument(
-        '-v', '--verbose',
-        action='store_true',
-        help='Show detailed validation information'
-    )
+    Returns:
+        (notebook_patterns, verbose, skip_structure_check)
+    """
+    prog = os.path.basename(argv[0])
+    usage = _USAGE.format(prog=prog)
     
-    parser.add_argument(
-        '--skip-structure-check',
-        action='store_true',
-        help='Skip basic structure validation (only check source format)'
-    )
+    def fail(message: str):
+        print(usage, file=sys.stderr)
+        print(f"{prog}: error: {message}", file=sys.stderr)
+        sys.exit(2)
     
-    args = parser.parse_args()
+    notebooks = []
+    verbose = False
+    skip_structure_check = False
     
-    # Collect all notebook files
+    args = iter(argv[1:])
+    for arg in args:
+        if arg == '--':
+            notebooks.extend(args)
+            break
+        elif arg.startswith('--'):
+            options = [option for option in _LONG_OPTIONS if option.startswith(arg)]
+            if len(options) > 1:
+                fail(f"ambiguous option: {arg} could match {', '.join(options)}")
+            elif not options:
+                fail(f"unrecognized arguments: {arg}")
+        elif arg.startswith('-') and arg != '-':
+            if not all(flag in _SHORT_OPTIONS for flag in arg[1:]):
+                fail(f"unrecognized arguments: {arg}")
+            options = [_SHORT_OPTIONS[flag] for flag in arg[1:]]
+        else:
+            notebooks.append(arg)
+            continue
+        
+        for option in options:
+            if option == '--help':
+                print(_HELP.format(usage=usage, prog=prog), end='')
+                sys.exit(0)
+            elif option == '--verbose':
+                verbose = True
+            else:
+                skip_structure_check = True
+    
+    if not notebooks:
+        fail("the following arguments are required: notebooks")
+    
+    return notebooks, verbose, skip_structure_check
+
+
+def _collect_notebooks(patterns: List[str]) -> List[Path]:
+    """
+    Expand notebook paths and glob patterns into notebook files.
+    
+    Each directory is scanned at most once, however many patterns point into it.
+    """
     notebook_files = []
-    for pattern in args.notebooks:
+    listings = {}  # directory -> names of the .ipynb entries in it
+    for pattern in patterns:
         path = Path(pattern)
         if path.exists() and path.is_file():
             notebook_files.append(path)
         elif '*' in pattern or '?' in pattern:
-            # Handle glob patterns
-            import glob
-            notebook_files.extend([Path(f) for f in glob.glob(pattern) if Path(f).suffix == '.ipynb'])
+            root, name_pattern = os.path.split(pattern)
+            if any(c in root for c in '*?['):
+                # Wildcards in the directory part need a full glob walk
+                import glob
+                notebook_files.extend([Path(f) for f in glob.glob(pattern) if Path(f).suffix == '.ipynb'])
+                continue
+            
+            import fnmatch
+            if root not in listings:
+                try:
+                    with os.scandir(root or os.curdir) as entries:
+                        listings[root] = [entry.name for entry in entries if entry.name.endswith('.ipynb')]
+                except OSError:
+                    listings[root] = []
+            names = listings[root]
+            if not name_pattern.startswith('.'):
+                # Like glob, wildcards do not match hidden files
+                names = [name for name in names if not name.startswith('.')]
+            notebook_files.extend(Path(root, name) for name in fnmatch.filter(names, name_pattern))
         else:
             print(f"Warning: File not found: {pattern}", file=sys.stderr)
     
+    return notebook_files
+
+
+def main():
+    patterns, verbose, skip_structure_check = parse_args(sys.argv)
+    
+    # Collect all notebook files
+    notebook_files = _collect_notebooks(patterns)
+    
     if not notebook_files:
         print("Error: No notebook files found", file=sys.stderr)
         sys.exit(1)
@@ -235,34 +347,33 @@ Examples:
     all_valid = True
     total_errors = 0
     
-    for notebook_path in notebook_files:
-        if args.verbose:
+    # Notebooks are independent, but only large jobs are worth a process pool
+    max_workers = min(len(notebook_files), os.cpu_count() or 1)
+    if max_workers > 1 and _total_size(notebook_files) >= _PARALLEL_MIN_BYTES:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_validate_one, notebook_files, repeat(skip_structure_check)))
+    else:
+        results = [_validate_one(path, skip_structure_check) for path in notebook_files]
+    
+    for notebook_path, (is_valid, failed_check, errors) in zip(notebook_files, results):
+        if verbose:
             print(f"\nValidating: {notebook_path}")
             print("=" * 60)
         
-        # Structure validation
-        if not args.skip_structure_check:
-            struct_valid, struct_errors = validate_notebook_structure(notebook_path)
-            if not struct_valid:
-                all_valid = False
-                total_errors += len(struct_errors)
-                print(f"\n✗ {notebook_path}: Structure validation failed")
-                for error in struct_errors:
-                    print(f"  - {error}")
-                continue
-        
-        # Source format validation
-        format_valid, format_errors = validate_notebook_source_format(notebook_path)
-        
-        if format_valid:
-            if args.verbose:
+        if is_valid:
+            if verbose:
                 print(f"✓ {notebook_path}: Format is valid")
+            continue
+        
+        all_valid = False
+        total_errors += len(errors)
+        if failed_check == 'Structure':
+            print(f"\n✗ {notebook_path}: Structure validation failed")
         else:
-            all_valid = False
-            total_errors += len(format_errors)
-            print(f"\n✗ {notebook_path}: Format validation failed ({len(format_errors)} error(s))")
-            for error in format_errors:
-                print(f"  - {error}")
+            print(f"\n✗ {notebook_path}: Format validation failed ({len(errors)} error(s))")
+        for error in errors:
+            print(f"  - {error}")
     
     # Summary
     print("\n" + "=" * 60)